@@ -7,7 +7,84 @@ function, making it computationally efficient under tight computational
 budgets.
 """
 
-from game2048 import Game2048
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from game2048 import (Game2048, CELL_BITS, LINE_BITS, LINE_EMPTY_COUNT, LINE_MASK, LINE_MAX,
+                      SIZE, empty_cells, get_col)
+
+# (tile exponent, probability) pairs for chance nodes: 1 -> 2, 2 -> 4
+SPAWNS = ((1, 0.9), (2, 0.1))
+# Near the leaves the 4-spawn is folded into the 2-spawn
+SPARSE_SPAWNS = ((1, 1.0),)
+
+def _build_heuristic_tables():
+    """
+    Precompute the monotonicity and smoothness terms of evaluate() for
+    every packed 12-bit line (row, or column read top to bottom).
+    """
+    mono, smooth = [], []
+    for line in range(1 << LINE_BITS):
+        exps = [(line >> (CELL_BITS * i)) & 0xF for i in range(SIZE)]
+        vals = [1 << e if e else 0 for e in exps]
+        mono_score = 0
+        smoothness = 0
+        for i in range(SIZE-1):
+            if vals[i] >= vals[i+1]:
+                mono_score += vals[i] - vals[i+1]
+            if vals[i] != 0 and vals[i+1] != 0:
+                smoothness -= abs(vals[i] - vals[i+1])
+        mono.append(mono_score)
+        smooth.append(smoothness)
+    return mono, smooth
+
+LINE_MONO_SCORE, LINE_SMOOTHNESS = _build_heuristic_tables()
+
+# Heuristic weights
+SCORE_WEIGHT = 1.0
+EMPTY_WEIGHT = 100.0
+CORNER_WEIGHT = 1.5
+MONO_WEIGHT = 1.0
+SMOOTH_WEIGHT = 1.0
+
+@lru_cache(maxsize=1 << 18)
+def evaluate_bits(bits):
+    """
+    Board-only part of ExpectimaxAgent.evaluate (everything but the score
+    term), computed from per-line table lookups. Memoized, since sibling
+    branches frequently reach the same board.
+    """
+    r0 = bits & LINE_MASK
+    r1 = (bits >> LINE_BITS) & LINE_MASK
+    r2 = bits >> (2 * LINE_BITS)
+    c0, c1, c2 = get_col(bits, 0), get_col(bits, 1), get_col(bits, 2)
+
+    # Empty tiles
+    empty_tiles = LINE_EMPTY_COUNT[r0] + LINE_EMPTY_COUNT[r1] + LINE_EMPTY_COUNT[r2]
+
+    # Corner bonus for largest tile
+    max_e = max(LINE_MAX[r0], LINE_MAX[r1], LINE_MAX[r2])
+    corner_bonus = 0
+    if max_e and max_e in (r0 & 0xF, r0 >> 8, r2 & 0xF, r2 >> 8):
+        corner_bonus = (1 << max_e) * 2
+
+    # Monotonicity penalty (lower is better), per row and column
+    mono_score = (LINE_MONO_SCORE[r0] + LINE_MONO_SCORE[r1] + LINE_MONO_SCORE[r2] +
+                  LINE_MONO_SCORE[c0] + LINE_MONO_SCORE[c1] + LINE_MONO_SCORE[c2])
+
+    # Smoothness penalty between adjacent tiles
+    smoothness = (LINE_SMOOTHNESS[r0] + LINE_SMOOTHNESS[r1] + LINE_SMOOTHNESS[r2] +
+                  LINE_SMOOTHNESS[c0] + LINE_SMOOTHNESS[c1] + LINE_SMOOTHNESS[c2])
+
+    return (
+        EMPTY_WEIGHT * empty_tiles +
+        CORNER_WEIGHT * corner_bonus +
+        MONO_WEIGHT * mono_score +
+        SMOOTH_WEIGHT * smoothness
+    )
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when select_action's time limit has passed."""
 
 class ExpectimaxAgent:
     """
@@ -16,26 +93,108 @@ class ExpectimaxAgent:
     Uses fixed-depth expectimax search where:
     - Max nodes represent player moves
     - Chance nodes represent random tile spawns (2 with p=0.9, 4 with p=0.1)
+
+    Search results are cached in a transposition table keyed by
+    (bits, depth, is_max). With the built-in evaluate, which has the form
+    score + f(board), values are stored relative to the state's score so
+    entries stay valid across moves. A custom heuristic may depend on the
+    score in any way, so its entries hold absolute values and the score
+    is added to the key. The table is bounded to tt_size entries with LRU
+    eviction.
+
+    Chance nodes with at most sparse_depth plies left only branch on the
+    2-spawn, halving the fan-out where the 4-spawn barely moves the
+    estimate. Set sparse_depth=0 for full enumeration.
+
+    Without a time_limit, select_action searches straight to depth. With
+    time_limit set it deepens iteratively from depth 1, trying the
+    previous iteration's best move first. Once the limit passes, the
+    current iteration is abandoned and the deepest completed result is
+    played (or the first legal move if even depth 1 did not finish).
     """
-    def __init__(self, depth=4, heuristic=None):
+    def __init__(self, depth=4, heuristic=None, tt_size=1 << 20, sparse_depth=2,
+                 time_limit=None):
         self.depth = depth
         self.h = heuristic
+        self.sparse_depth = sparse_depth
+        self.time_limit = time_limit
+        self.tt = OrderedDict()
+        self.tt_size = tt_size
+        self._pv = {}  # bits -> best move from the last completed iteration
+        self._deadline = None
 
     def select_action(self, state):
         """Selects the best move from the current state."""
-        _, move = self.expectimax(state, self.depth, is_max=True)
+        if self.time_limit is None:
+            _, move = self.expectimax(state, self.depth, is_max=True)
+            return move
+
+        self._deadline = time.time() + self.time_limit
+        self._pv.clear()
+        move = None
+        try:
+            for d in range(1, self.depth + 1):
+                _, best = self.expectimax(state, d, is_max=True)
+                if best is not None:
+                    move = best
+                    self._pv[state.bits] = best
+        except _SearchTimeout:
+            pass
+        finally:
+            self._deadline = None
+        if move is None:
+            actions = state.get_actions()
+            move = actions[0] if actions else None
         return move
 
+    def _ordered_actions(self, state, depth):
+        """
+        Legal moves with the principal-variation move first, falling back
+        to the best move cached for the next-shallower search of this board.
+        """
+        actions = state.get_actions()
+        hint = self._pv.get(state.bits)
+        if hint is None:
+            entry = self.tt.get(self._tt_key(state, depth - 1, True))
+            hint = entry[1] if entry is not None else None
+        if hint in actions and actions[0] != hint:
+            actions.remove(hint)
+            actions.insert(0, hint)
+        return actions
+
+    def _tt_key(self, state, depth, is_max):
+        """Transposition-table key; includes the score for custom heuristics."""
+        if self.h is None:
+            return (state.bits, depth, is_max)
+        return (state.bits, state.score, depth, is_max)
+
     def expectimax(self, state, depth, is_max):
         """
         Recursive expectimax search.
         Returns (expected_value, best_action).
         """
+        key = self._tt_key(state, depth, is_max)
+        offset = state.score if self.h is None else 0
+        hit = self.tt.get(key)
+        if hit is not None:
+            self.tt.move_to_end(key)
+            return hit[0] + offset, hit[1]
+
+        value, move = self._search(state, depth, is_max)
+        self.tt[key] = (value - offset, move)
+        if len(self.tt) > self.tt_size:
+            self.tt.popitem(last=False)
+        return value, move
+
+    def _search(self, state, depth, is_max):
+        """Expand a node that missed the transposition table."""
+        if self._deadline is not None and time.time() > self._deadline:
+            raise _SearchTimeout
         if depth == 0 or state.is_terminal():
             value = self.h.evaluate(state) if self.h else self.evaluate(state)
             return value, None
 
-        actions = state.get_actions()
+        actions = self._ordered_actions(state, depth) if is_max else state.get_actions()
         if not actions:
             value = self.h.evaluate(state) if self.h else self.evaluate(state)
             return value, None
@@ -53,18 +212,27 @@ class ExpectimaxAgent:
             return best_value, best_move
         else:
             # Chance node: expected value over all tile spawns
-            empty_cells = [(i, j) for i in range(len(state.board)) for j in range(len(state.board[0])) if state.board[i][j] == 0]
-            if not empty_cells:
+            cells = empty_cells(state.bits)
+            if not cells:
                 return self.h.evaluate(state) if self.h else self.evaluate(state), None
 
+            spawns = SPARSE_SPAWNS if depth <= self.sparse_depth else SPAWNS
+            if depth == 1 and self.h is None:
+                # Children are leaves: evaluate all sibling boards in one
+                # batch instead of recursing into each of them.
+                expected_value = SCORE_WEIGHT * state.score
+                for tile, prob in spawns:
+                    children = [state.bits | (tile << (CELL_BITS * p)) for p in cells]
+                    expected_value += sum(map(evaluate_bits, children)) * prob / len(cells)
+                return expected_value, None
+
             expected_value = 0
-            for (i, j) in empty_cells:
-                for tile, prob in [(2, 0.9), (4, 0.1)]:
-                    new_board = [row[:] for row in state.board]
-                    new_board[i][j] = tile
-                    child_state = type(state)(new_board, state.score)
+            for p in cells:
+                for tile, prob in spawns:
+                    child_bits = state.bits | (tile << (CELL_BITS * p))
+                    child_state = type(state)(child_bits, state.score)
                     value, _ = self.expectimax(child_state, depth-1, is_max=True)
-                    expected_value += value * prob / len(empty_cells)
+                    expected_value += value * prob / len(cells)
             return expected_value, None
 
     def evaluate(self, state):
@@ -76,55 +244,4 @@ class ExpectimaxAgent:
         - Board monotonicity
         - Tile smoothness
         """
-        board = state.board
-        size = len(board)
-
-        # Empty tiles
-        empty_tiles = sum(1 for row in board for v in row if v == 0)
-
-        # Corner bonus for largest tile
-        max_tile = max(max(row) for row in board)
-        corner_bonus = 0
-        corners = [board[0][0], board[0][size-1], board[size-1][0], board[size-1][size-1]]
-        if max_tile in corners:
-            corner_bonus = max_tile * 2
-
-        # Monotonicity penalty (lower is better)
-        mono_score = 0
-        for row in board:
-            for i in range(size-1):
-                if row[i] >= row[i+1]:
-                    mono_score += row[i+1] - row[i]
-        for c in range(size):
-            for r in range(size-1):
-                if board[r][c] >= board[r+1][c]:
-                    mono_score += board[r+1][c] - board[r][c]
-        mono_score = -mono_score  # smaller penalty is better
-
-        # Smoothness penalty between adjacent tiles
-        smoothness = 0
-        for r in range(size):
-            for c in range(size):
-                if board[r][c] == 0:
-                    continue
-                for dr, dc in [(0, 1), (1, 0)]:
-                    nr, nc = r + dr, c + dc
-                    if nr < size and nc < size and board[nr][nc] != 0:
-                        smoothness -= abs(board[r][c] - board[nr][nc])
-
-        # Weighted heuristic sum
-        score_weight = 1.0
-        empty_weight = 100.0
-        corner_weight = 1.5
-        mono_weight = 1.0
-        smooth_weight = 1.0
-
-        heuristic_value = (
-            score_weight * state.score +
-            empty_weight * empty_tiles +
-            corner_weight * corner_bonus +
-            mono_weight * mono_score +
-            smooth_weight * smoothness
-        )
-
-        return heuristic_value
+        return SCORE_WEIGHT * state.score + evaluate_bits(state.bits)
@@ -1,5 +1,179 @@
 import random
 
+# Bitboard layout
+# ---------------
+# The 3×3 board is packed into a single int. Each cell holds the log2 of its
+# tile value in a 4-bit nibble (0 = empty, 1 = 2, 2 = 4, ..., 11 = 2048), which
+# is plenty since the game ends as soon as a 2048 tile appears. Cell (r, c)
+# lives at nibble 3*r + c, so row r is the 12-bit slice starting at bit 12*r.
+# Columns are gathered into the same 12-bit "line" format (top cell first) so
+# that every move reduces to a table lookup on a single line.
+SIZE = 3
+CELL_BITS = 4
+LINE_BITS = SIZE * CELL_BITS
+LINE_MASK = (1 << LINE_BITS) - 1
+WIN_EXPONENT = 11  # 2048
+
+def _unpack_line(line):
+    """Return the exponents of a packed line as a list (index 0 first)."""
+    return [(line >> (CELL_BITS * i)) & 0xF for i in range(SIZE)]
+
+def _pack_line(exponents):
+    """Pack a list of exponents into a line (index 0 in the low nibble)."""
+    line = 0
+    for i, e in enumerate(exponents):
+        line |= e << (CELL_BITS * i)
+    return line
+
+def _merge_line(exponents):
+    """Slide and merge a line towards index 0; return (exponents, score gain)."""
+    tiles = [e for e in exponents if e != 0]
+    merged = []
+    gain = 0
+    i = 0
+    while i < len(tiles):
+        if i+1 < len(tiles) and tiles[i] == tiles[i+1]:
+            # Clamp so a (never reached) 2**15 merge cannot spill into the next nibble
+            merged.append(min(tiles[i] + 1, 0xF))
+            gain += 1 << (tiles[i] + 1)
+            i += 2
+        else:
+            merged.append(tiles[i])
+            i += 1
+    # pad with zeros
+    merged += [0]*(len(exponents) - len(merged))
+    return merged, gain
+
+def _reverse_line(line):
+    """Reverse the cell order of a packed line."""
+    return ((line & 0xF) << 8) | (line & 0xF0) | (line >> 8)
+
+def _build_tables():
+    """
+    Precompute per-line move results and helpers for every 12-bit line.
+    Only the left merge is simulated; right moves are its mirror image.
+    """
+    left, spread, empty_mask, line_max, has_merge = [], [], [], [], []
+    for line in range(1 << LINE_BITS):
+        a, b, c = line & 0xF, (line >> 4) & 0xF, line >> 8
+        merged, gain = _merge_line([a, b, c])
+        left.append((_pack_line(merged), gain))
+        # Scatter a column line back to its board positions (column 0)
+        spread.append(a | (b << 12) | (c << 24))
+        empty_mask.append((a == 0) | ((b == 0) << 1) | ((c == 0) << 2))
+        line_max.append(max(a, b, c))
+        has_merge.append((a == b != 0) or (b == c != 0))
+    right = []
+    for line in range(1 << LINE_BITS):
+        merged, gain = left[_reverse_line(line)]
+        right.append((_reverse_line(merged), gain))
+    return left, right, spread, empty_mask, line_max, has_merge
+
+# ROW_LEFT[line] / ROW_RIGHT[line] -> (new_line, score_gain) for sliding a line
+# towards index 0 / index 2. Up and down reuse them on column lines.
+ROW_LEFT, ROW_RIGHT, COL_SPREAD, LINE_EMPTY_MASK, LINE_MAX, LINE_HAS_MERGE = _build_tables()
+LINE_EMPTY_COUNT = [bin(mask).count('1') for mask in LINE_EMPTY_MASK]
+
+# For a 9-bit cell mask: SET_BITS[mask] -> positions of its set bits (in
+# order), so SET_BITS[mask][k] is the k-th set bit; POPCOUNT[mask] -> count.
+SET_BITS = [tuple(p for p in range(SIZE * SIZE) if mask >> p & 1)
+            for mask in range(1 << (SIZE * SIZE))]
+POPCOUNT = [len(cells) for cells in SET_BITS]
+
+def get_row(bits, r):
+    """Return row r of a bitboard as a packed line."""
+    return (bits >> (LINE_BITS * r)) & LINE_MASK
+
+def get_col(bits, c):
+    """Return column c of a bitboard as a packed line (top cell first)."""
+    bits >>= CELL_BITS * c
+    return (bits & 0xF) | ((bits >> 8) & 0xF0) | ((bits >> 16) & 0xF00)
+
+# One specialised function per direction, with the three line lookups
+# unrolled (row r starts at bit 12*r; column c starts at nibble c).
+def move_left(bits):
+    """Slide the bitboard left; return (new_bits, score_gain)."""
+    l0, g0 = ROW_LEFT[bits & 0xFFF]
+    l1, g1 = ROW_LEFT[(bits >> 12) & 0xFFF]
+    l2, g2 = ROW_LEFT[bits >> 24]
+    return l0 | (l1 << 12) | (l2 << 24), g0 + g1 + g2
+
+def move_right(bits):
+    """Slide the bitboard right; return (new_bits, score_gain)."""
+    l0, g0 = ROW_RIGHT[bits & 0xFFF]
+    l1, g1 = ROW_RIGHT[(bits >> 12) & 0xFFF]
+    l2, g2 = ROW_RIGHT[bits >> 24]
+    return l0 | (l1 << 12) | (l2 << 24), g0 + g1 + g2
+
+def move_up(bits):
+    """Slide the bitboard up; return (new_bits, score_gain)."""
+    b1, b2 = bits >> 4, bits >> 8
+    l0, g0 = ROW_LEFT[(bits & 0xF) | ((bits >> 8) & 0xF0) | ((bits >> 16) & 0xF00)]
+    l1, g1 = ROW_LEFT[(b1 & 0xF) | ((b1 >> 8) & 0xF0) | ((b1 >> 16) & 0xF00)]
+    l2, g2 = ROW_LEFT[(b2 & 0xF) | ((b2 >> 8) & 0xF0) | ((b2 >> 16) & 0xF00)]
+    return COL_SPREAD[l0] | (COL_SPREAD[l1] << 4) | (COL_SPREAD[l2] << 8), g0 + g1 + g2
+
+def move_down(bits):
+    """Slide the bitboard down; return (new_bits, score_gain)."""
+    b1, b2 = bits >> 4, bits >> 8
+    l0, g0 = ROW_RIGHT[(bits & 0xF) | ((bits >> 8) & 0xF0) | ((bits >> 16) & 0xF00)]
+    l1, g1 = ROW_RIGHT[(b1 & 0xF) | ((b1 >> 8) & 0xF0) | ((b1 >> 16) & 0xF00)]
+    l2, g2 = ROW_RIGHT[(b2 & 0xF) | ((b2 >> 8) & 0xF0) | ((b2 >> 16) & 0xF00)]
+    return COL_SPREAD[l0] | (COL_SPREAD[l1] << 4) | (COL_SPREAD[l2] << 8), g0 + g1 + g2
+
+MOVES = {'up': move_up, 'down': move_down, 'left': move_left, 'right': move_right}
+
+def move_bits(bits, direction):
+    """Slide the bitboard in the given direction; return (new_bits, score_gain)."""
+    return MOVES[direction](bits)
+
+def empty_mask(bits):
+    """Return a 9-bit mask with bit p set when cell p (= 3*r + c) is empty."""
+    return (LINE_EMPTY_MASK[bits & LINE_MASK]
+            | LINE_EMPTY_MASK[(bits >> LINE_BITS) & LINE_MASK] << SIZE
+            | LINE_EMPTY_MASK[(bits >> (2 * LINE_BITS)) & LINE_MASK] << (2 * SIZE))
+
+def empty_cells(bits):
+    """Return the positions p (= 3*r + c) of all empty cells, as a tuple."""
+    return SET_BITS[empty_mask(bits)]
+
+def random_empty_cell(mask):
+    """Return the position of a uniformly chosen set bit of a non-zero 9-bit mask."""
+    return SET_BITS[mask][random.randrange(POPCOUNT[mask])]
+
+def max_exponent(bits):
+    """Return the log2 of the largest tile on the board (0 if empty)."""
+    return max(LINE_MAX[bits & LINE_MASK],
+               LINE_MAX[(bits >> LINE_BITS) & LINE_MASK],
+               LINE_MAX[(bits >> (2 * LINE_BITS)) & LINE_MASK])
+
+def add_random_tile(bits):
+    """Spawn a random tile (2 or 4) on an empty cell of the bitboard."""
+    mask = empty_mask(bits)
+    if mask:
+        p = random_empty_cell(mask)
+        bits |= (1 if random.random() < 0.9 else 2) << (CELL_BITS * p)
+    return bits
+
+def encode_board(board):
+    """Pack a list-of-lists board of tile values into a bitboard."""
+    bits = 0
+    for r, row in enumerate(board):
+        for c, val in enumerate(row):
+            if val:
+                bits |= (val.bit_length() - 1) << (CELL_BITS * (SIZE * r + c))
+    return bits
+
+def decode_board(bits):
+    """Unpack a bitboard into a list-of-lists board of tile values."""
+    board = []
+    for r in range(SIZE):
+        row = []
+        for e in _unpack_line(get_row(bits, r)):
+            row.append(1 << e if e else 0)
+        board.append(row)
+    return board
+
 class Game2048:
     """
     2048 Game (3×3 Variant) Implementation.
@@ -9,56 +183,68 @@ class Game2048:
     The game ends when no legal moves remain or when a tile value of 2048 is achieved.
 
     The code is structured to allow for the simulation of game moves, generating random tiles, and computing the score.
+    Boards are stored as packed bitboards (see the layout notes at the top of this module).
     """
-    size = 3 # Board size
+    size = SIZE # Board size
 
     def initial_state(self):
         """Return the initial state of the game with two random tiles"""
-        board = [[0 for _ in range(self.size)] for _ in range(self.size)]
-        board = self._add_random_tile(board)
-        board = self._add_random_tile(board)
-        return Game2048.State(board, 0)
+        bits = self._add_random_tile(0)
+        bits = self._add_random_tile(bits)
+        return Game2048.State(bits, 0)
 
-    def _add_random_tile(self, board):
+    def _add_random_tile(self, bits):
         """Add a random tile (2 or 4) to an empty space on the board."""
-        empty = [(i, j) for i in range(self.size) for j in range(self.size) if board[i][j] == 0]
-        if empty:
-            i, j = random.choice(empty)
-            board[i][j] = 2 if random.random() < 0.9 else 4
-        return board
+        return add_random_tile(bits)
 
     class State:
-        def __init__(self, board, score):
-            """Initialize the game state with a deep copy of the board and the current score."""
-            self.board = [row[:] for row in board]
+        __slots__ = ('bits', 'score', '_move_cache')
+
+        def __init__(self, bits, score):
+            """Initialize the game state from a packed bitboard and the current score."""
+            self.bits = bits
             self.score = score
+            self._move_cache = None  # {move: (new_bits, score_gain)}, filled on demand
+
+        @classmethod
+        def from_board(cls, board, score):
+            """Build a state from a list-of-lists board of tile values."""
+            return cls(encode_board(board), score)
+
+        @property
+        def board(self):
+            """The board as a list-of-lists of tile values (decoded on access)."""
+            return decode_board(self.bits)
 
         def get_actions(self):
             """Return a list of legal moves available from the current state."""
-            actions = []
-            for move in ['up', 'down', 'left', 'right']:
-                new_board, _ = self._simulate_move(move, simulate_random_tile=False)
-                if not self._boards_equal(new_board, self.board):
-                    actions.append(move)
-            return actions
+            return list(self._compute_moves())
 
         def successor(self, move):
             """Return the new state resulting from applying the given move."""
-            new_board, gained_score = self._simulate_move(move, simulate_random_tile=True)
-            return Game2048.State(new_board, self.score + gained_score)
+            new_bits, gained_score = self._simulate_move(move, simulate_random_tile=True)
+            return Game2048.State(new_bits, self.score + gained_score)
 
         def is_terminal(self):
-            # Terminal if no moves left OR any tile >= 2048
-            for row in self.board:
-                if any(tile >= 2048 for tile in row):
-                    return True
-            return len(self.get_actions()) == 0
+            # Terminal if no moves left OR any tile >= 2048. Some move is
+            # legal iff the board has an empty cell (and any tile at all) or
+            # two equal neighbours in a row or column.
+            bits = self.bits
+            r0 = bits & LINE_MASK
+            r1 = (bits >> LINE_BITS) & LINE_MASK
+            r2 = bits >> (2 * LINE_BITS)
+            if max(LINE_MAX[r0], LINE_MAX[r1], LINE_MAX[r2]) >= WIN_EXPONENT:
+                return True
+            if bits and (LINE_EMPTY_MASK[r0] or LINE_EMPTY_MASK[r1] or LINE_EMPTY_MASK[r2]):
+                return False
+            return not (LINE_HAS_MERGE[r0] or LINE_HAS_MERGE[r1] or LINE_HAS_MERGE[r2]
+                        or LINE_HAS_MERGE[get_col(bits, 0)] or LINE_HAS_MERGE[get_col(bits, 1)]
+                        or LINE_HAS_MERGE[get_col(bits, 2)])
 
         def payoff(self):
             """Return the payoff of the current state (bonus if 2048 is achieved)."""
-            for row in self.board:
-                if any(tile >= 2048 for tile in row):
-                    return 100000 + self.score  # Bonus for reaching 2048
+            if max_exponent(self.bits) >= WIN_EXPONENT:
+                return 100000 + self.score  # Bonus for reaching 2048
             return self.score
 
         def actor(self):
@@ -66,66 +252,29 @@ class Game2048:
             return 0
 
         def _simulate_move(self, direction, simulate_random_tile=True):
-            """Simulate the effect of a move (without modifying the current state)."""
-            size = len(self.board)
-            score_gain = 0
-            new_board = [row[:] for row in self.board]
-
-            def merge(line):
-                """Merge tiles in a given line (row or column) and calculate score gain."""
-                nonlocal score_gain
-                tiles = [x for x in line if x != 0]
-                merged = []
-                i = 0
-                while i < len(tiles):
-                    if i+1 < len(tiles) and tiles[i] == tiles[i+1]:
-                        merged.append(tiles[i]*2)
-                        score_gain += tiles[i]*2
-                        i += 2
-                    else:
-                        merged.append(tiles[i])
-                        i += 1
-                # pad with zeros
-                merged += [0]*(len(line) - len(merged))
-                return merged
-
-            if direction == 'left':
-                for r in range(size):
-                    new_board[r] = merge(new_board[r])
-
-            elif direction == 'right':
-                for r in range(size):
-                    new_board[r] = merge(new_board[r][::-1])[::-1]
-
-            elif direction == 'up':
-                for c in range(size):
-                    col = [new_board[r][c] for r in range(size)]
-                    merged = merge(col)
-                    for r in range(size):
-                        new_board[r][c] = merged[r]
-
-            elif direction == 'down':
-                for c in range(size):
-                    col = [new_board[r][c] for r in range(size)][::-1]
-                    merged = merge(col)[::-1]
-                    for r in range(size):
-                        new_board[r][c] = merged[r]
+            """Simulate the effect of a move (without modifying the current state).
 
+            Returns (new_bits, score_gain).
+            """
+            new_bits, score_gain = self._compute_moves().get(direction, (self.bits, 0))
             if simulate_random_tile:
-                empty = [(i, j) for i in range(size) for j in range(size) if new_board[i][j] == 0]
-                if empty:
-                    i, j = random.choice(empty)
-                    new_board[i][j] = 2 if random.random() < 0.9 else 4
-
-            return new_board, score_gain
-
-        def _boards_equal(self, b1, b2):
-            """Helper function to compare two boards."""
-            for r in range(len(b1)):
-                for c in range(len(b1[r])):
-                    if b1[r][c] != b2[r][c]:
-                        return False
-            return True
+                new_bits = add_random_tile(new_bits)
+            return new_bits, score_gain
+
+        def _compute_moves(self):
+            """
+            Return {move: (new_bits, score_gain)} for every move that changes
+            the board. Computed once per state and reused by get_actions and
+            successor.
+            """
+            if self._move_cache is None:
+                moves = {}
+                for move, apply_move in MOVES.items():
+                    new_bits, score_gain = apply_move(self.bits)
+                    if new_bits != self.bits:
+                        moves[move] = (new_bits, score_gain)
+                self._move_cache = moves
+            return self._move_cache
 
         def __str__(self):
             """Return a string representation of the current game state."""
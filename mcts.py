@@ -11,14 +11,32 @@ Key Features:
   max tile in corner)
 - Controlled rollout variance by forcing the most probable tile (2)
 - Time-limited search per move
+- Optional root parallelization across worker processes
+- Optional tree parallelization across threads with virtual loss
 """
 
 import time
 import math
 import random
-from game2048 import Game2048 
+import threading
+import weakref
+import multiprocessing
+from collections import Counter
+from functools import lru_cache
+from game2048 import (Game2048, CELL_BITS, LINE_BITS, LINE_EMPTY_COUNT, LINE_MASK, LINE_MAX,
+                      MOVES, WIN_EXPONENT, add_random_tile, empty_mask, get_col,
+                      max_exponent, random_empty_cell)
+
+# UCB lookup tables: LOG_TABLE[n] = log(n + 1), INV_SQRT[n] = 1 / sqrt(n).
+# Visit counts beyond the table fall back to math.
+UCB_TABLE_SIZE = 1 << 15
+LOG_TABLE = [math.log(n + 1) for n in range(UCB_TABLE_SIZE)]
+INV_SQRT = [0.0] + [1 / math.sqrt(n) for n in range(1, UCB_TABLE_SIZE)]
 
 class Node:
+    __slots__ = ('state', 'parent', 'children', 'value', 'visits', 'remaining_actions',
+                 'action', 'vloss')
+
     def __init__(self, state, parent=None, action=None):
         self.state = state                  # Game state at this node
         self.parent = parent                # Parent node
@@ -27,49 +45,70 @@ class Node:
         self.visits = 0                     # Visit count
         self.remaining_actions = state.get_actions() if not state.is_terminal() else []
         self.action = action                # Action taken from parent
+        self.vloss = 0                      # In-flight rollouts (virtual loss)
 
     def is_fully_expanded(self):
         return len(self.remaining_actions) == 0
 
     def best_child(self, c=1.5):
-        """Selects child using UCB (exploit + explore)."""
-        choices_weights = []
+        """
+        Selects child using UCB (exploit + explore) in a single pass.
+        In-flight rollouts count as visits with zero reward (virtual loss),
+        steering concurrent threads down different paths.
+        """
+        n_parent = self.visits + self.vloss
+        log_n = LOG_TABLE[n_parent] if n_parent < UCB_TABLE_SIZE else math.log(n_parent + 1)
+        explore = math.sqrt(c * log_n)  # sqrt(c * log_n / n) = explore / sqrt(n)
+        best_w = -float('inf')
+        best_child = None
         for child in self.children:
-            if child.visits == 0:
-                choices_weights.append(float('inf'))
-            else:
-                exploit = child.value / child.visits
-                explore = math.sqrt(c * math.log(self.visits + 1) / child.visits)
-                choices_weights.append(exploit + explore)
-        return self.children[choices_weights.index(max(choices_weights))]
+            n = child.visits + child.vloss
+            if n == 0:
+                return child  # unvisited children have infinite weight
+            inv_sqrt = INV_SQRT[n] if n < UCB_TABLE_SIZE else 1 / math.sqrt(n)
+            w = child.value / n + explore * inv_sqrt
+            if w > best_w:
+                best_w = w
+                best_child = child
+        return best_child
 
 # Predicate weights updated across rollouts to bias evaluation
-pred_history = {
-    'max_in_corner': 1.0,
-    'empty_count': 1.0,
-    'monotonic_rows': 1.0,
-    'monotonic_cols': 1.0
-}
-
-def board_predicates(board):
-    """Extracts heuristic predicates used during rollouts."""
-    size = len(board)
-    preds = {}
-    max_tile = max(max(row) for row in board)
-    preds['max_in_corner'] = int(max_tile in (board[0][0], board[0][-1], board[-1][0], board[-1][-1]))
-    preds['empty_count'] = sum(cell == 0 for row in board for cell in row)
-    row_mono = sum(all(row[i] <= row[i+1] for i in range(size-1)) for row in board)
-    col_mono = sum(all(board[i][j] <= board[i+1][j] for i in range(size-1)) for j in range(size))
-    preds['monotonic_rows'] = row_mono
-    preds['monotonic_cols'] = col_mono
-    return preds
-
-def predicate_score(board):
-    preds = board_predicates(board)
-    score = 0
-    for key, value in preds.items():
-        score += value * pred_history.get(key, 1.0)
-    return score
+PRED_NAMES = ('max_in_corner', 'empty_count', 'monotonic_rows', 'monotonic_cols')
+pred_history = [1.0] * len(PRED_NAMES)
+
+def _line_monotonic(line):
+    """True if a packed line is non-decreasing from index 0 to 2."""
+    a, b, c = line & 0xF, (line >> 4) & 0xF, line >> 8
+    return a <= b <= c
+
+# Per-line predicate tables, indexed by a packed 12-bit row or column
+LINE_MONOTONIC = [int(_line_monotonic(line)) for line in range(1 << LINE_BITS)]
+
+@lru_cache(maxsize=1 << 18)
+def board_predicates(bits):
+    """
+    Extracts heuristic predicates used during rollouts, as a tuple
+    ordered like PRED_NAMES. Each predicate is a sum of per-line table
+    lookups over the three rows and three columns, so no cell-by-cell
+    scan is needed. Memoized on the board; predicate_score is not, since
+    pred_history changes after every rollout.
+    """
+    r0 = bits & LINE_MASK
+    r1 = (bits >> LINE_BITS) & LINE_MASK
+    r2 = bits >> (2 * LINE_BITS)
+    c0, c1, c2 = get_col(bits, 0), get_col(bits, 1), get_col(bits, 2)
+    max_e = max(LINE_MAX[r0], LINE_MAX[r1], LINE_MAX[r2])
+    return (
+        int(max_e in (r0 & 0xF, r0 >> 8, r2 & 0xF, r2 >> 8)),
+        LINE_EMPTY_COUNT[r0] + LINE_EMPTY_COUNT[r1] + LINE_EMPTY_COUNT[r2],
+        LINE_MONOTONIC[r0] + LINE_MONOTONIC[r1] + LINE_MONOTONIC[r2],
+        LINE_MONOTONIC[c0] + LINE_MONOTONIC[c1] + LINE_MONOTONIC[c2],
+    )
+
+def predicate_score(bits):
+    p0, p1, p2, p3 = board_predicates(bits)
+    w0, w1, w2, w3 = pred_history
+    return p0 * w0 + p1 * w1 + p2 * w2 + p3 * w3
 
 def select(node):
     while node.is_fully_expanded() and not node.state.is_terminal():
@@ -85,45 +124,71 @@ def expand(node):
         return child
     return node
 
-def rollout(node):
-    """
-    Performs a rollout using predicate-based evaluation.
-    Randomness is reduced by forcing the most probable tile spawn (2).
+def rollout_bits(bits, score):
     """
-    state = node.state
-    size = len(state.board)
+    Rollout kernel on a raw bitboard; returns the final game score.
 
-    while not state.is_terminal():
-        actions = state.get_actions()
+    Works on plain ints and the game2048 move tables so no State objects
+    are allocated per step.
+    """
+    while max_exponent(bits) < WIN_EXPONENT:
         best_score = -1
-        best_moves = []
-
-        for action in actions:
-            # Simulate without random tile so we can force a deterministic 2
-            # for lookahead scoring only — avoids double-spawning.
-            next_board, _ = state._simulate_move(action, simulate_random_tile=False)
-            empty = [(i, j) for i in range(size) for j in range(size) if next_board[i][j] == 0]
-            if empty:
-                fi, fj = random.choice(empty)
-                next_board[fi][fj] = 2
-            score = predicate_score(next_board)
-            if score > best_score:
-                best_score = score
-                best_moves = [action]
-            elif score == best_score:
-                best_moves.append(action)
-
-        action = random.choice(best_moves)
+        best_move = None
+        ties = 0
+
+        for apply_move in MOVES.values():
+            moved, gain = apply_move(bits)
+            if moved == bits:
+                continue
+            # Force a deterministic 2 for lookahead scoring only — the real
+            # (random) spawn is applied once the move is chosen.
+            next_bits = moved
+            mask = empty_mask(moved)
+            if mask:
+                next_bits |= 1 << (CELL_BITS * random_empty_cell(mask))
+            move_score = predicate_score(next_bits)
+            if move_score > best_score:
+                best_score = move_score
+                best_move = (moved, gain)
+                ties = 1
+            elif move_score == best_score:
+                # Reservoir sampling: uniform over tied moves, no list needed
+                ties += 1
+                if random.random() * ties < 1.0:
+                    best_move = (moved, gain)
+
+        if best_move is None:
+            break
+        moved, gain = best_move
         # Apply the chosen move with a real (random) tile spawn
-        state = state.successor(action)
+        bits = add_random_tile(moved)
+        score += gain
 
     # Update historical predicate scores
-    final_score = state.score
-    preds = board_predicates(state.board)
-    for key, value in preds.items():
-        pred_history[key] = 0.9 * pred_history.get(key, 1.0) + 0.1 * final_score
+    for i, weight in enumerate(pred_history):
+        pred_history[i] = 0.9 * weight + 0.1 * score
 
-    return final_score
+    return score
+
+def repeated_rollouts(bits, score, k):
+    """
+    Runs k independent rollouts from the same board, one after another.
+    Returns their final scores.
+    """
+    return [rollout_bits(bits, score) for _ in range(k)]
+
+def rollout(node, k=1):
+    """
+    Performs a rollout using predicate-based evaluation.
+    Randomness is reduced by forcing the most probable tile spawn (2).
+    With k > 1, returns the mean of k rollouts from the same leaf
+    (rollout averaging). The rollouts run sequentially, so each iteration
+    costs about k times as much: the backed-up values have lower variance
+    but roughly k times fewer tree iterations fit in the time budget.
+    """
+    if k == 1:
+        return rollout_bits(node.state.bits, node.state.score)
+    return sum(repeated_rollouts(node.state.bits, node.state.score, k)) / k
 
 def backpropagate(node, result):
     while node is not None:
@@ -131,34 +196,171 @@ def backpropagate(node, result):
         node.value += result
         node = node.parent
 
-def mcts_policy(time_limit=1.0):
+def add_virtual_loss(node):
+    while node is not None:
+        node.vloss += 1
+        node = node.parent
+
+def release_virtual_loss(node):
+    """Removes the virtual loss on a path without recording a result."""
+    while node is not None:
+        node.vloss -= 1
+        node = node.parent
+
+def backpropagate_virtual(node, result):
+    """Backpropagates a result and releases the virtual loss on its path."""
+    while node is not None:
+        node.vloss -= 1
+        node.visits += 1
+        node.value += result
+        node = node.parent
+
+def _tree_parallel_search(root, f_time, rollouts_per_leaf, n_threads):
+    """
+    Runs n_threads select/expand/rollout/backpropagate loops on a shared
+    tree until f_time. Tree updates are serialized by a lock; rollouts
+    run outside it. Returns max_iter_time. If a thread fails, its virtual
+    loss is released and the first error is re-raised once all threads
+    have finished.
+    """
+    lock = threading.Lock()
+    iter_times = [0.0] * n_threads
+    errors = []
+
+    def worker(i):
+        while time.time() < f_time and not errors:
+            iter_start = time.time()
+            with lock:
+                node = select(root)
+                if not node.state.is_terminal():
+                    node = expand(node)
+                add_virtual_loss(node)
+            try:
+                result = rollout(node, rollouts_per_leaf)
+            except Exception as e:
+                with lock:
+                    release_virtual_loss(node)
+                errors.append(e)
+                return
+            with lock:
+                backpropagate_virtual(node, result)
+            iter_times[i] = max(iter_times[i], time.time() - iter_start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return max(iter_times)
+
+def search(position, f_time, rollouts_per_leaf=1, n_threads=1):
+    """
+    Runs the select/expand/rollout/backpropagate loop from position until
+    the absolute deadline f_time (a time.time() value).
+    Returns (root, max_iter_time).
+    """
+    root = Node(position)
+    if n_threads > 1:
+        return root, _tree_parallel_search(root, f_time, rollouts_per_leaf, n_threads)
+    max_iter_time = 0.0
+
+    while time.time() < f_time:
+        iter_start = time.time()
+        node = select(root)
+        if not node.state.is_terminal():
+            node = expand(node)
+        result = rollout(node, rollouts_per_leaf)
+        backpropagate(node, result)
+        iter_time = time.time() - iter_start
+        max_iter_time = max(max_iter_time, iter_time)
+
+    return root, max_iter_time
+
+def _root_worker(args):
+    """Root-parallel worker: search an independent tree, return its statistics."""
+    position, f_time, rollouts_per_leaf, n_threads, history = args
+    pred_history[:] = history
+    root, max_iter_time = search(position, f_time, rollouts_per_leaf, n_threads)
+    visits = {child.action: child.visits for child in root.children}
+    return visits, root.visits, list(pred_history), max_iter_time
+
+def _merge_root_results(results):
+    """
+    Merges worker results: visit counts are summed per action and the
+    predicate weights are averaged, weighted by each worker's rollouts.
+    """
+    visits = Counter()
+    total = 0
+    history = [0.0] * len(pred_history)
+    max_iter_time = 0.0
+    for worker_visits, n, worker_history, iter_time in results:
+        visits.update(worker_visits)
+        total += n
+        for i, weight in enumerate(worker_history):
+            history[i] += n * weight
+        max_iter_time = max(max_iter_time, iter_time)
+    if total:
+        pred_history[:] = [weight / total for weight in history]
+    return visits, max_iter_time
+
+def mcts_policy(time_limit=1.0, n_workers=1, rollouts_per_leaf=1, n_threads=1):
     """
     Returns a policy function that runs MCTS for a fixed time per move.
     Used in experimental comparison against Expectimax.
+
+    With n_workers > 1 the search is root-parallelized: each worker
+    process builds its own tree from the same position and the move with
+    the most visits summed across trees is played. Workers stop at the
+    parent's deadline, so dispatch overhead counts against the budget
+    instead of being added to it. Workers are forked
+    once, on the first call, and reused for every move. Call
+    policy.close() to shut them down; they are also terminated when the
+    policy is garbage-collected.
+
+    rollouts_per_leaf > 1 averages several sequential rollouts from each
+    newly expanded leaf before backpropagating. This steadies value
+    estimates at the cost of proportionally fewer tree iterations.
+
+    n_threads > 1 runs that many threads on one shared tree, using
+    virtual loss so they descend different paths. Threads share the
+    interpreter lock, so this mainly helps on interpreters without one.
     """
+    pool = None
+    finalizer = None
+
     def policy(position):
-        root = Node(position)
-        f_time = time.time() + time_limit
-        max_iter_time = 0.0
+        nonlocal pool, finalizer
+        if n_workers > 1 and pool is None:
+            pool = multiprocessing.get_context('fork').Pool(n_workers)
+            finalizer = weakref.finalize(policy, pool.terminate)
+        start = time.time()
+        f_time = start + time_limit
 
-        while time.time() < f_time:
-            iter_start = time.time()
-            node = select(root)
-            if not node.state.is_terminal():
-                node = expand(node)
-            result = rollout(node)
-            backpropagate(node, result)
-            iter_time = time.time() - iter_start
-            max_iter_time = max(max_iter_time, iter_time)
-
-        elapsed = time.time() - (f_time - time_limit)
+        if n_workers > 1:
+            task = (position, f_time, rollouts_per_leaf, n_threads, list(pred_history))
+            visits, max_iter_time = _merge_root_results(pool.map(_root_worker, [task] * n_workers))
+        else:
+            root, max_iter_time = search(position, f_time, rollouts_per_leaf, n_threads)
+            visits = Counter({child.action: child.visits for child in root.children})
+
+        elapsed = time.time() - start
         if elapsed > time_limit + max_iter_time:
             print(f"WARNING: MCTS exceeded time limit! Time taken: {elapsed:.4f} s, limit: {time_limit} s")
         print(f"Max iteration time this move: {max_iter_time:.6f} s, total time: {elapsed:.4f} s")
 
-        if not root.children:
+        if not visits:
             return random.choice(position.get_actions())
-        best_child_node = max(root.children, key=lambda c: c.visits)
-        return best_child_node.action
+        return max(visits, key=visits.get)
+
+    def close():
+        """Terminates the worker pool, if one was started."""
+        nonlocal pool, finalizer
+        if finalizer is not None:
+            finalizer()
+            pool.join()
+        pool = finalizer = None
 
+    policy.close = close
     return policy
@@ -26,8 +26,9 @@ than inherently suboptimal.
 """
 
 import time
-from mcts import mcts_policy
-from game2048 import Game2048
+import random
+from mcts import mcts_policy, board_predicates
+from game2048 import Game2048, decode_board
 from expectimax import ExpectimaxAgent
 import math
 import statistics
@@ -53,6 +54,108 @@ def conf_interval(scores, confidence=0.95):
     margin = z * (std / math.sqrt(n))
     return mean - margin, mean + margin
 
+# Reference list-of-lists implementations (the original board code), used to
+# check the bitboard tables in game2048/expectimax/mcts.
+def _reference_move(board, direction):
+    """Returns (new_board, score_gain) for a list-of-lists board."""
+    size = len(board)
+    score_gain = 0
+    new_board = [row[:] for row in board]
+
+    def merge(line):
+        nonlocal score_gain
+        tiles = [x for x in line if x != 0]
+        merged = []
+        i = 0
+        while i < len(tiles):
+            if i+1 < len(tiles) and tiles[i] == tiles[i+1]:
+                merged.append(tiles[i]*2)
+                score_gain += tiles[i]*2
+                i += 2
+            else:
+                merged.append(tiles[i])
+                i += 1
+        return merged + [0]*(len(line) - len(merged))
+
+    for k in range(size):
+        if direction == 'left':
+            new_board[k] = merge(new_board[k])
+        elif direction == 'right':
+            new_board[k] = merge(new_board[k][::-1])[::-1]
+        else:
+            col = [new_board[r][k] for r in range(size)]
+            merged = merge(col) if direction == 'up' else merge(col[::-1])[::-1]
+            for r in range(size):
+                new_board[r][k] = merged[r]
+    return new_board, score_gain
+
+def _reference_evaluate(board, score):
+    """ExpectimaxAgent.evaluate computed by scanning the board."""
+    size = len(board)
+    empty_tiles = sum(1 for row in board for v in row if v == 0)
+    max_tile = max(max(row) for row in board)
+    corners = [board[0][0], board[0][size-1], board[size-1][0], board[size-1][size-1]]
+    corner_bonus = max_tile * 2 if max_tile in corners else 0
+    mono_score = 0
+    for row in board:
+        for i in range(size-1):
+            if row[i] >= row[i+1]:
+                mono_score += row[i+1] - row[i]
+    for c in range(size):
+        for r in range(size-1):
+            if board[r][c] >= board[r+1][c]:
+                mono_score += board[r+1][c] - board[r][c]
+    smoothness = 0
+    for r in range(size):
+        for c in range(size):
+            if board[r][c] == 0:
+                continue
+            for nr, nc in [(r, c+1), (r+1, c)]:
+                if nr < size and nc < size and board[nr][nc] != 0:
+                    smoothness -= abs(board[r][c] - board[nr][nc])
+    return score + 100.0 * empty_tiles + 1.5 * corner_bonus - mono_score + smoothness
+
+def _reference_predicates(board):
+    """board_predicates computed by scanning the board, ordered like PRED_NAMES."""
+    size = len(board)
+    max_tile = max(max(row) for row in board)
+    return (
+        int(max_tile in (board[0][0], board[0][-1], board[-1][0], board[-1][-1])),
+        sum(cell == 0 for row in board for cell in row),
+        sum(all(row[i] <= row[i+1] for i in range(size-1)) for row in board),
+        sum(all(board[i][j] <= board[i+1][j] for i in range(size-1)) for j in range(size)),
+    )
+
+def check_bitboard(num_boards=5000, seed=0):
+    """
+    Compares the bitboard game logic and heuristics against the reference
+    list-of-lists implementations on random boards. Raises AssertionError
+    on the first mismatch.
+    """
+    rng = random.Random(seed)
+    tiles = [0, 0, 0, 2, 4, 8, 16, 64, 512, 1024, 2048]
+    agent = ExpectimaxAgent()
+    for _ in range(num_boards):
+        board = [[rng.choice(tiles) for _ in range(3)] for _ in range(3)]
+        score = rng.randint(0, 5000)
+        state = Game2048.State.from_board(board, score)
+        assert state.board == board, board
+
+        actions = []
+        for move in ['up', 'down', 'left', 'right']:
+            ref_board, ref_gain = _reference_move(board, move)
+            new_bits, gain = state._simulate_move(move, simulate_random_tile=False)
+            assert (decode_board(new_bits), gain) == (ref_board, ref_gain), (board, move)
+            if ref_board != board:
+                actions.append(move)
+        assert state.get_actions() == actions, board
+        won = any(v >= 2048 for row in board for v in row)
+        assert state.is_terminal() == (won or not actions), board
+
+        assert agent.evaluate(state) == _reference_evaluate(board, score), board
+        assert board_predicates(state.bits) == _reference_predicates(board), board
+    print(f"Bitboard check passed on {num_boards} random boards")
+
 def evaluate_mcts_vs_expectimax(num_games=100, mcts_time=0.1):
     """
     Runs a head-to-head evaluation of MCTS vs Expectimax.
@@ -104,5 +207,6 @@ def evaluate_mcts_vs_expectimax(num_games=100, mcts_time=0.1):
 
 # Entry point
 if __name__ == "__main__":
+    check_bitboard()
     # Default run used for grading (short runtime)
     evaluate_mcts_vs_expectimax(num_games=100, mcts_time=0.5)
@@ -36,33 +36,35 @@ TILE_COLORS = {
 def tile_color(val):
     return TILE_COLORS.get(val, ("\033[1;97m", "\033[0m"))
 
+def render_cell(val):
+    color, reset = tile_color(val)
+    cell = f"{val:^5}" if val != 0 else "  ·  "
+    return f" {color}{cell}{reset} │"
+
+# Styled cell strings and borders, built once at import
+CELL_RENDERED = {val: render_cell(val) for val in TILE_COLORS}
+
+SIZE = Game2048.size
+TOP    = "┌" + ("─" * 7 + "┬") * (SIZE - 1) + "─" * 7 + "┐"
+BOTTOM = "└" + ("─" * 7 + "┴") * (SIZE - 1) + "─" * 7 + "┘"
+MID    = "├" + ("─" * 7 + "┼") * (SIZE - 1) + "─" * 7 + "┤"
+
 def render_board(state, agent_name, move_num, last_move, elapsed):
     """Renders the board with colors and stats to stdout."""
     board = state.board
-    size = len(board)
-
-    # Top border
-    h_line = "┼" + ("─" * 7 + "┼") * size
-    top     = "┌" + ("─" * 7 + "┬") * (size - 1) + "─" * 7 + "┐"
-    bottom  = "└" + ("─" * 7 + "┴") * (size - 1) + "─" * 7 + "┘"
-    mid     = "├" + ("─" * 7 + "┼") * (size - 1) + "─" * 7 + "┤"
 
     lines = []
     lines.append(f"\n  🎮  2048  —  {agent_name}")
     lines.append(f"  Move: {move_num:<4}  Score: {state.score:<6}  Last: {last_move or '—':<6}  Time: {elapsed:.1f}s")
-    lines.append("  " + top)
+    lines.append("  " + TOP)
 
     for r, row in enumerate(board):
-        row_str = "  │"
-        for val in row:
-            color, reset = tile_color(val)
-            cell = f"{val:^5}" if val != 0 else "  ·  "
-            row_str += f" {color}{cell}{reset} │"
-        lines.append(row_str)
-        if r < size - 1:
-            lines.append("  " + mid)
-
-    lines.append("  " + bottom)
+        lines.append("  │" + "".join(
+            CELL_RENDERED[val] if val in CELL_RENDERED else render_cell(val) for val in row))
+        if r < SIZE - 1:
+            lines.append("  " + MID)
+
+    lines.append("  " + BOTTOM)
     return "\n".join(lines)
 
 def clear():